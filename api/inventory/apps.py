@@ -6,3 +6,7 @@ NAME = "api.inventory"
 class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = NAME
+
+    def ready(self) -> None:
+        """ジョブとして実行する関数を登録する"""
+        from api.inventory import tasks  # noqa: F401
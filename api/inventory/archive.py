@@ -0,0 +1,110 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
+from django.db import models
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.inventory.history import bump_history_version
+from api.inventory.models import OpeningBalance
+from api.inventory.models import Purchase
+from api.inventory.models import PurchaseArchive
+from api.inventory.models import Sales
+from api.inventory.models import SalesArchive
+
+
+@dataclass
+class ArchiveResult:
+    """アーカイブの結果"""
+
+    purchases: int = 0
+    sales: int = 0
+
+
+def get_cutoff(before: date | None = None, days: int | None = None) -> datetime:
+    """アーカイブする境界の日時を求める
+
+    Args:
+        before (date, optional): この日付の0時(UTC)を境界にする
+        days (int, optional): before が無い場合、現在からこの日数前を境界にする
+    """
+    if before is not None:
+        return datetime.combine(before, time.min, tzinfo=UTC)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_ledger(cutoff: datetime, chunk_size: int = 1000) -> ArchiveResult:
+    """cutoffより前の仕入・売上をアーカイブテーブルへ移す
+
+    移した数量は商品毎の繰越在庫に加算するので、在庫数は変わらない。
+    chunk_size件毎に短いトランザクションで処理し、長時間のロックを取らない。
+    1チャンクの中で、アーカイブへの登録、繰越在庫の加算、元の行の削除を
+    まとめてコミットするので、途中で中断しても在庫数は常に正しい。
+
+    Args:
+        cutoff (datetime): この日時より前の行をアーカイブする
+        chunk_size (int): 1トランザクションで移す件数
+
+    Returns:
+        ArchiveResult: アーカイブした件数
+    """
+    return ArchiveResult(
+        purchases=_archive_rows(
+            Purchase, PurchaseArchive, "purchase_date", 1, cutoff, chunk_size
+        ),
+        sales=_archive_rows(Sales, SalesArchive, "sales_date", -1, cutoff, chunk_size),
+    )
+
+
+def _archive_rows(  # noqa: PLR0913
+    model: type[models.Model],
+    archive_model: type[models.Model],
+    date_field: str,
+    sign: int,
+    cutoff: datetime,
+    chunk_size: int,
+) -> int:
+    """1種類の台帳をチャンク毎にアーカイブする
+
+    日時のインデックスが無くても全件走査を繰り返さないよう、主キー順に進める。
+    """
+    archived = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                model.objects.filter(id__gt=last_id, **{f"{date_field}__lt": cutoff})
+                .order_by("id")
+                .values("id", "product_id", "quantity", date_field)[:chunk_size]
+            )
+            if not rows:
+                return archived
+
+            archive_model.objects.bulk_create(archive_model(**row) for row in rows)
+            quantities: dict[int, int] = defaultdict(int)
+            for row in rows:
+                quantities[row["product_id"]] += sign * row["quantity"]
+            for product_id, quantity in quantities.items():
+                _add_opening_balance(product_id, quantity, cutoff)
+                bump_history_version(product_id)
+            model.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        archived += len(rows)
+        last_id = rows[-1]["id"]
+
+
+def _add_opening_balance(product_id: int, quantity: int, cutoff: datetime) -> None:
+    """繰越在庫に数量を加算する"""
+    balance, _ = OpeningBalance.objects.select_for_update().get_or_create(
+        product_id=product_id, defaults={"balance_date": cutoff}
+    )
+    OpeningBalance.objects.filter(pk=balance.pk).update(
+        quantity=F("quantity") + quantity,
+        balance_date=max(balance.balance_date, cutoff),
+    )
@@ -0,0 +1,156 @@
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection
+from django.db import transaction
+from django.urls import Resolver404
+from django.urls import resolve
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# バッチで受け付けるメソッド。ビューが対応していなければ、そのビューが405を返す
+METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+# 並列実行してよい、データを変更しないメソッド
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+def dispatch_batch(
+    request: Request, items: list[dict[str, Any]], *, parallel: bool
+) -> list[dict[str, Any]]:
+    """まとめて受け取ったリクエストを各ビューへ振り分けて実行する
+
+    認証はバッチのリクエストで1度だけ行い、個々のリクエストには
+    認証済みのユーザを引き継ぐ。ミドルウェアも通さない。
+
+    Args:
+        request (Request): バッチのリクエスト
+        items (list[dict]): method、path、body、headersを持つリクエストの一覧
+        parallel (bool): 全てが読み取りのリクエストの場合に並列実行するか
+
+    Returns:
+        list[dict]: リクエストと同じ順のstatus、headers、bodyの一覧
+    """
+    if parallel and all(item["method"] in READ_ONLY_METHODS for item in items):
+        return _dispatch_in_parallel(request, items)
+    return [_dispatch_safely(request, item) for item in items]
+
+
+def _dispatch_in_parallel(
+    request: Request, items: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """リクエストをスレッド毎に振り分けて並列に実行する
+
+    DB接続はスレッド毎に開くので、リクエスト毎ではなくスレッド毎に1度だけ接続する。
+    """
+    workers = min(settings.BATCH_MAX_WORKERS, len(items))
+    responses: list[dict[str, Any]] = [{}] * len(items)
+
+    def run(start: int) -> None:
+        try:
+            for index in range(start, len(items), workers):
+                responses[index] = _dispatch_safely(request, items[index])
+        finally:
+            # スレッド毎に開いた接続を残さない
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # 例外は _dispatch_safely で処理済み。結果を読んで想定外の例外も伝える
+        list(executor.map(run, range(workers)))
+    return responses
+
+
+def _dispatch_safely(request: Request, item: dict[str, Any]) -> dict[str, Any]:
+    """1件のリクエストを実行する
+
+    ビューで例外が発生しても他のリクエストの結果を失わないよう、
+    その1件の変更だけをロールバックして500の結果にする。
+    """
+    try:
+        with transaction.atomic():
+            return _dispatch(request, item)
+    except Exception:
+        logger.exception(
+            "バッチ内のリクエストでエラーが発生しました: %s %s",
+            item["method"],
+            item["path"],
+        )
+        return {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "headers": {},
+            "body": {"detail": "サーバーエラーが発生しました。"},
+        }
+
+
+def _dispatch(request: Request, item: dict[str, Any]) -> dict[str, Any]:
+    """1件のリクエストを組み立て、URLに対応するビューを呼び出す"""
+    url = urlsplit(item["path"])
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        return {
+            "status": status.HTTP_404_NOT_FOUND,
+            "headers": {},
+            "body": {"detail": "見つかりませんでした。"},
+        }
+    if match.url_name == "batch":
+        return {
+            "status": status.HTTP_400_BAD_REQUEST,
+            "headers": {},
+            "body": {"detail": "バッチの中でバッチは実行できません。"},
+        }
+
+    sub_request = _build_request(request, item, url.path, url.query)
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    headers = {
+        key: value for key, value in response.items() if key.lower() != "content-type"
+    }
+    return {
+        "status": response.status_code,
+        "headers": headers,
+        # HEADは本文を返さない
+        "body": None if item["method"] == "HEAD" else getattr(response, "data", None),
+    }
+
+
+def _build_request(
+    request: Request, item: dict[str, Any], path: str, query: str
+) -> WSGIRequest:
+    """バッチのリクエストを元に、個々のリクエストを組み立てる"""
+    body = b""
+    if item.get("body") is not None:
+        # MessagePackで受け取った日時等も扱えるよう、DRFのエンコーダを使う
+        body = json.dumps(item["body"], cls=JSONEncoder).encode()
+
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH") and not key.startswith("wsgi.")
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": item["method"],
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+    )
+    for name, value in item.get("headers", {}).items():
+        environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+
+    sub_request = WSGIRequest(environ)
+    # 認証済みのユーザを引き継ぎ、個々のビューで再度認証しない
+    sub_request._force_auth_user = request.user  # noqa: SLF001
+    sub_request._force_auth_token = request.auth  # noqa: SLF001
+    return sub_request
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from api.inventory.models import Product
+
+
+def bump_history_version(product_id: int) -> None:
+    """商品の履歴バージョンを進める
+
+    仕入・売上の登録や価格の変更など、在庫履歴のレスポンスが変わる操作の後に呼ぶ。
+    登録処理と同じトランザクション内で呼ぶこと。
+    """
+    Product.objects.filter(pk=product_id).update(
+        history_version=F("history_version") + 1,
+        history_updated_at=timezone.now(),
+    )
+
+
+def get_history_etag(
+    product: dict, media_format: str, *, include_archived: bool
+) -> str:
+    """在庫履歴レスポンスの強いETagを組み立てる
+
+    Args:
+        product (dict): 商品のid、price、history_versionを持つ辞書
+        media_format (str): レスポンスのフォーマット(json等)
+        include_archived (bool): アーカイブ済みの履歴を含めるか
+
+    Returns:
+        str: ETag
+    """
+    return (
+        f'"{_history_key(product, include_archived=include_archived)}-{media_format}"'
+    )
+
+
+def get_cached_history(product: dict, *, include_archived: bool) -> list | None:
+    """キャッシュ済みの在庫履歴を取得する"""
+    return cache.get(
+        f"inventory:history:{_history_key(product, include_archived=include_archived)}"
+    )
+
+
+def set_cached_history(product: dict, data: list, *, include_archived: bool) -> None:
+    """在庫履歴をキャッシュする
+
+    キーに履歴バージョンを含めるので、履歴が変われば古いキャッシュは参照されなくなる
+    """
+    cache.set(
+        f"inventory:history:{_history_key(product, include_archived=include_archived)}",
+        data,
+        settings.INVENTORY_HISTORY_CACHE_TIMEOUT,
+    )
+
+
+def _history_key(product: dict, *, include_archived: bool) -> str:
+    # 履歴の単価には商品の価格を使うので、価格もキーに含める
+    scope = "all" if include_archived else "hot"
+    return f"{product['id']}-{product['history_version']}-{product['price']}-{scope}"
@@ -0,0 +1,219 @@
+import datetime
+import logging
+import threading
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction
+from django.db.models import F
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api.inventory.models import Job
+
+if TYPE_CHECKING:
+    from rest_framework.serializers import Serializer
+
+logger = logging.getLogger(__name__)
+
+TaskFunc = Callable[[dict[str, Any]], Any]
+
+_tasks: dict[str, TaskFunc] = {}
+_payload_serializers: dict[str, type["Serializer"]] = {}
+
+
+def task(
+    name: str, payload_serializer: type["Serializer"] | None = None
+) -> Callable[[TaskFunc], TaskFunc]:
+    """ジョブとして実行できる関数を登録するデコレータ
+
+    登録した関数はジョブの payload を受け取り、JSONに変換できる結果を返す。
+
+    Args:
+        name (str): ジョブ名
+        payload_serializer (type[Serializer], optional): payload を検証するシリアライザ
+    """
+
+    def decorator(func: TaskFunc) -> TaskFunc:
+        _tasks[name] = func
+        if payload_serializer is not None:
+            _payload_serializers[name] = payload_serializer
+        return func
+
+    return decorator
+
+
+def get_task_names() -> list[str]:
+    """登録済みのジョブ名を取得する"""
+    return sorted(_tasks)
+
+
+def get_payload_serializer(name: str) -> type["Serializer"] | None:
+    """ジョブの payload を検証するシリアライザを取得する。無ければNone"""
+    return _payload_serializers.get(name)
+
+
+def enqueue(
+    name: str,
+    payload: dict[str, Any] | None = None,
+    *,
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> Job:
+    """ジョブを登録する
+
+    Args:
+        name (str): ジョブ名
+        payload (dict, optional): ジョブに渡す引数
+        priority (int, optional): 優先度。大きいほど先に実行する
+        max_attempts (int, optional): 失敗時を含めた最大試行回数
+
+    Returns:
+        Job: 登録したジョブ
+    """
+    if name not in _tasks:
+        errmsg = f"未登録のジョブです: {name}"
+        raise ValueError(errmsg)
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+    )
+
+
+def claim_next_job() -> Job | None:
+    """実行可能なジョブを1件取り出し、実行中にする
+
+    複数のワーカが同時に取り出しても同じジョブを二重に実行しないよう、
+    状態が待機中のままであることを条件に更新できたものだけを返す。
+    取り出す前に、タイムアウトした実行中のジョブを待機中に戻す。
+    """
+    now = timezone.now()
+    _reclaim_stale_jobs(now)
+    candidates = (
+        Job.objects.filter(status=Job.Status.PENDING, run_after__lte=now)
+        .order_by("-priority", "run_after", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(pk=job_id, status=Job.Status.PENDING).update(
+            status=Job.Status.RUNNING,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job: Job) -> None:
+    """ジョブを実行し、結果を保存する
+
+    失敗した場合は最大試行回数に達するまで、試行回数に応じて
+    指数的に間隔を空けて再実行する。
+    実行中は別スレッドで生存確認を更新し、長時間のジョブが再実行されないようにする。
+    """
+    try:
+        func = _tasks[job.name]
+        with _heartbeat(job):
+            result = func(job.payload)
+        # 結果をJSONに変換できない場合も失敗として扱う。
+        # 呼び出し元のトランザクション内でも失敗を記録できるよう、セーブポイントを張る
+        with transaction.atomic():
+            saved = _owned(job).update(
+                status=Job.Status.SUCCEEDED,
+                result=result,
+                error="",
+                finished_at=timezone.now(),
+            )
+        if not saved:
+            logger.warning(
+                "再実行されたジョブの結果は保存しません: id=%s name=%s",
+                job.pk,
+                job.name,
+            )
+    except Exception as e:
+        logger.exception("ジョブの実行に失敗しました: id=%s name=%s", job.pk, job.name)
+        _handle_failure(job, e)
+
+
+def _reclaim_stale_jobs(now: datetime.datetime) -> None:
+    """生存確認が JOB_RUNNING_TIMEOUT 秒途絶えたジョブを再実行できるようにする
+
+    ワーカが強制終了された場合など、実行中のまま残ったジョブを対象にする。
+    取り出した時点で試行回数は加算済みなので、最大試行回数に達していれば失敗にする。
+    """
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        heartbeat_at__lt=now - datetime.timedelta(seconds=settings.JOB_RUNNING_TIMEOUT),
+    )
+    error = "生存確認が途絶えました"
+    stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Job.Status.PENDING, error=error, run_after=now
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, error=error, finished_at=now
+    )
+
+
+@contextmanager
+def _heartbeat(job: Job) -> Iterator[None]:
+    """ブロックを実行している間、JOB_HEARTBEAT_INTERVAL 秒毎に生存確認を更新する"""
+    stop = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                if not _owned(job).update(heartbeat_at=timezone.now()):
+                    logger.warning(
+                        "ジョブが他のワーカで再実行されています: id=%s", job.pk
+                    )
+                    return
+        except Exception:
+            logger.exception("生存確認の更新に失敗しました: id=%s", job.pk)
+        finally:
+            # スレッド毎に開いた接続を残さない
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _owned(job: Job) -> QuerySet[Job]:
+    """このワーカが取り出した時のまま実行中のジョブ
+
+    タイムアウトで再実行された場合は試行回数が変わるので、古いワーカは更新できない。
+    """
+    return Job.objects.filter(
+        pk=job.pk, status=Job.Status.RUNNING, attempts=job.attempts
+    )
+
+
+def _handle_failure(job: Job, error: Exception) -> None:
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        backoff = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        _owned(job).update(
+            status=Job.Status.PENDING,
+            error=repr(error),
+            run_after=now + datetime.timedelta(seconds=backoff),
+        )
+        return
+
+    _owned(job).update(
+        status=Job.Status.FAILED,
+        error=repr(error),
+        finished_at=now,
+    )
@@ -0,0 +1,120 @@
+import atexit
+import logging
+import threading
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.auth.models import update_last_login
+from django.db import connection
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """最終ログイン日時の書き込みバッファ
+
+    ログインの度に auth_user へ UPDATE を発行すると、ログインが集中する時間帯に
+    書き込みが直列化される。
+    ユーザ毎に最新のログイン日時だけをメモリに保持し、
+    `LAST_LOGIN_FLUSH_INTERVAL` 秒毎にバックグラウンドスレッドから
+    まとめて bulk_update する。DBへの反映の遅れは最大でその秒数になる。
+    """
+
+    def __init__(self, batch_size: int = 500) -> None:
+        """初期化処理
+
+        Args:
+            batch_size (int): 1回のUPDATEでまとめる件数。
+                この件数が溜まった時点で間隔を待たずに書き込む
+        """
+        self._batch_size = batch_size
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, user: AbstractBaseUser) -> None:
+        """ログイン日時をバッファに記録する"""
+        now = timezone.now()
+        user.last_login = now
+        with self._lock:
+            self._pending[user.pk] = now
+            is_full = len(self._pending) >= self._batch_size
+        self._ensure_worker()
+        if is_full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """バッファの内容をDBへ書き込む
+
+        Returns:
+            int: 更新したユーザ数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        user_model = get_user_model()
+        users = [user_model(pk=pk, last_login=date) for pk, date in pending.items()]
+        try:
+            user_model.objects.bulk_update(
+                users, ["last_login"], batch_size=self._batch_size
+            )
+        except Exception:
+            # 書き込めなかった分は、より新しいログインが無ければ次回に持ち越す
+            with self._lock:
+                for pk, date in pending.items():
+                    self._pending.setdefault(pk, date)
+            raise
+        return len(users)
+
+    def _ensure_worker(self) -> None:
+        """書き込みスレッドが動いていなければ起動する
+
+        fork型のワーカで子プロセスにスレッドが引き継がれないよう、
+        最初に記録されたタイミングで遅延起動する。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="last-login-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(settings.LAST_LOGIN_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("最終ログイン日時の書き込みに失敗しました")
+            finally:
+                # スレッド専用の接続を持ち続けないよう毎回閉じる
+                connection.close()
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
+
+
+def record_login(user: AbstractBaseUser) -> None:
+    """最終ログイン日時を更新する
+
+    `LAST_LOGIN_FLUSH_INTERVAL` が0の場合はその場で更新し、
+    それ以外はバッファに記録してまとめて書き込む。
+    """
+    if not settings.LAST_LOGIN_FLUSH_INTERVAL:
+        update_last_login(None, user)
+        return
+    last_login_buffer.record(user)
@@ -0,0 +1,59 @@
+import datetime
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from api.inventory.archive import archive_ledger
+from api.inventory.archive import get_cutoff
+from api.inventory.serializers import ArchiveLedgerPayloadSerializer
+
+
+class Command(BaseCommand):
+    """古い仕入・売上をアーカイブするコマンド
+
+    例:
+        python manage.py archive_ledger --before 2024-01-01
+        python manage.py archive_ledger --days 365 --chunk-size 5000
+    """
+
+    help = "指定日時より前の仕入・売上をアーカイブテーブルへ移し、繰越在庫にまとめる"
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """引数の定義"""
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            "--before", type=datetime.date.fromisoformat, help="この日付より前を移す"
+        )
+        group.add_argument("--days", type=int, help="この日数より前を移す")
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="1トランザクションの件数"
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:  # noqa: ANN401
+        """アーカイブを実行する"""
+        # ジョブと同じ条件で検証する
+        serializer = ArchiveLedgerPayloadSerializer(
+            data={
+                key: options[key]
+                for key in ("before", "days", "chunk_size")
+                if options[key] is not None
+            }
+        )
+        if not serializer.is_valid():
+            errmsg = " ".join(
+                str(message)
+                for messages in serializer.errors.values()
+                for message in messages
+            )
+            raise CommandError(errmsg)
+
+        cutoff = get_cutoff(options["before"], options["days"])
+        result = archive_ledger(cutoff, chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{cutoff.isoformat()} より前の仕入{result.purchases}件、"
+                f"売上{result.sales}件をアーカイブしました"
+            )
+        )
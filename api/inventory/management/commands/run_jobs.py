@@ -0,0 +1,71 @@
+import logging
+import time
+from argparse import ArgumentParser
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.inventory.jobs import claim_next_job
+from api.inventory.jobs import run_job
+from api.inventory.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """バックグラウンドジョブを実行するワーカ
+
+    例:
+        python manage.py run_jobs --workers 4
+        python manage.py run_jobs --once
+    """
+
+    help = "登録されたジョブをスレッドプールで実行する"
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """引数の定義"""
+        parser.add_argument("--workers", type=int, default=2, help="同時実行数")
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="ジョブが無い時の待機秒数"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="実行可能なジョブが無くなったら終了する"
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:  # noqa: ANN401
+        """ジョブを取り出して実行し続ける"""
+        workers: int = options["workers"]
+        running: set[Future] = set()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    running = {future for future in running if not future.done()}
+                    job = claim_next_job() if len(running) < workers else None
+                    if job is not None:
+                        self.stdout.write(f"ジョブを開始します: id={job.pk} {job.name}")
+                        future = executor.submit(self._run, job)
+                        future.add_done_callback(self._log_exception)
+                        running.add(future)
+                        continue
+                    if options["once"] and not running:
+                        break
+                    time.sleep(options["poll_interval"])
+            except KeyboardInterrupt:
+                self.stdout.write("実行中のジョブの終了を待っています")
+
+    @staticmethod
+    def _log_exception(future: Future) -> None:
+        """結果の保存にも失敗した場合など、ジョブの外で起きた例外をログに出す"""
+        e = future.exception()
+        if e is not None:
+            logger.error("ワーカで例外が発生しました", exc_info=e)
+
+    def _run(self, job: Job) -> None:
+        try:
+            run_job(job)
+        finally:
+            # スレッド毎に開いた接続を残さない
+            connection.close()
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:45
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0002_purchase"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="history_updated_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="履歴更新日時"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="history_version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="履歴バージョン"
+            ),
+        ),
+    ]
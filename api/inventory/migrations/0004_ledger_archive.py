@@ -0,0 +1,79 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:46
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0003_product_history_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OpeningBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.IntegerField(default=0, verbose_name="数量")),
+                ("balance_date", models.DateTimeField(verbose_name="繰越日時")),
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="inventory.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "繰越在庫",
+                "db_table": "opening_balance",
+            },
+        ),
+        migrations.CreateModel(
+            name="PurchaseArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("quantity", models.IntegerField(verbose_name="数量")),
+                ("purchase_date", models.DateTimeField(verbose_name="仕入日時")),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="inventory.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "仕入アーカイブ",
+                "db_table": "purchase_archive",
+            },
+        ),
+        migrations.CreateModel(
+            name="SalesArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("quantity", models.IntegerField(verbose_name="数量")),
+                ("sales_date", models.DateTimeField(verbose_name="売上日時")),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="inventory.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "売上アーカイブ",
+                "db_table": "sales_archive",
+            },
+        ),
+    ]
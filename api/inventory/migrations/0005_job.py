@@ -0,0 +1,93 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:48
+
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0004_ledger_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="ジョブ名")),
+                ("payload", models.JSONField(default=dict, verbose_name="引数")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "待機中"),
+                            ("running", "実行中"),
+                            ("succeeded", "成功"),
+                            ("failed", "失敗"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="状態",
+                    ),
+                ),
+                ("priority", models.IntegerField(default=0, verbose_name="優先度")),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="試行回数"),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveIntegerField(default=3, verbose_name="最大試行回数"),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="実行予定日時"
+                    ),
+                ),
+                (
+                    "result",
+                    models.JSONField(blank=True, null=True, verbose_name="実行結果"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="エラー内容"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="登録日時"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="開始日時"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="終了日時"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ジョブ",
+                "db_table": "job",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-priority", "run_after"],
+                        name="job_queue_idx",
+                    )
+                ],
+            },
+        ),
+    ]
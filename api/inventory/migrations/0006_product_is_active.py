@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:59
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0005_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="is_active",
+            field=models.BooleanField(
+                default=True, editable=False, verbose_name="有効"
+            ),
+        ),
+    ]
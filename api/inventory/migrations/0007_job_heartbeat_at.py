@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:20
+
+from django.db import migrations
+from django.db import models
+from django.db.models import F
+
+
+def fill_heartbeat_at(apps, schema_editor):  # noqa: ANN001, ANN201, ARG001, D103
+    # 実行中のジョブも再実行の対象にできるよう、開始日時で埋める
+    job = apps.get_model("inventory", "Job")
+    job.objects.filter(status="running").update(heartbeat_at=F("started_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0006_product_is_active"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="生存確認日時"
+            ),
+        ),
+        migrations.RunPython(fill_heartbeat_at, migrations.RunPython.noop),
+    ]
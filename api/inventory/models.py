@@ -1,14 +1,36 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
 
+class ActiveProductManager(models.Manager):
+    """削除済みの商品を除外するマネージャ"""
+
+    def get_queryset(self) -> models.QuerySet:
+        """有効な商品だけを返す"""
+        return super().get_queryset().filter(is_active=True)
+
+
 class Product(models.Model):
     """商品"""
 
     name = models.CharField(max_length=100, verbose_name="商品名")
     price = models.IntegerField(verbose_name="価格")
     description = models.TextField(verbose_name="商品説明", null=True, blank=True)
+    # 仕入・売上の履歴が変わる度に加算する。履歴レスポンスのETagに使う
+    history_version = models.PositiveIntegerField(
+        verbose_name="履歴バージョン", default=0, editable=False
+    )
+    history_updated_at = models.DateTimeField(
+        verbose_name="履歴更新日時", null=True, blank=True, editable=False
+    )
+    # 論理削除フラグ。仕入・売上の物理削除はジョブで後から行う
+    is_active = models.BooleanField(verbose_name="有効", default=True, editable=False)
+
+    # 既定のマネージャは削除済みの商品を除外する。削除済みも扱う場合は all_objects を使う
+    objects = ActiveProductManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = "product"
@@ -37,3 +59,89 @@ class Sales(models.Model):
     class Meta:
         db_table = "sales"
         verbose_name = "売上"
+
+
+class OpeningBalance(models.Model):
+    """繰越在庫
+
+    アーカイブした仕入・売上の数量を商品毎にまとめたもの
+    """
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField(verbose_name="数量", default=0)
+    balance_date = models.DateTimeField(verbose_name="繰越日時")
+
+    class Meta:
+        db_table = "opening_balance"
+        verbose_name = "繰越在庫"
+
+
+class PurchaseArchive(models.Model):
+    """アーカイブ済みの仕入"""
+
+    # 仕入のidをそのまま引き継ぐ
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField(verbose_name="数量")
+    purchase_date = models.DateTimeField(verbose_name="仕入日時")
+
+    class Meta:
+        db_table = "purchase_archive"
+        verbose_name = "仕入アーカイブ"
+
+
+class SalesArchive(models.Model):
+    """アーカイブ済みの売上"""
+
+    # 売上のidをそのまま引き継ぐ
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField(verbose_name="数量")
+    sales_date = models.DateTimeField(verbose_name="売上日時")
+
+    class Meta:
+        db_table = "sales_archive"
+        verbose_name = "売上アーカイブ"
+
+
+class Job(models.Model):
+    """バックグラウンドジョブ"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "待機中"
+        RUNNING = "running", "実行中"
+        SUCCEEDED = "succeeded", "成功"
+        FAILED = "failed", "失敗"
+
+    name = models.CharField(max_length=100, verbose_name="ジョブ名")
+    payload = models.JSONField(verbose_name="引数", default=dict)
+    status = models.CharField(
+        max_length=10,
+        verbose_name="状態",
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    # 大きいほど先に実行する
+    priority = models.IntegerField(verbose_name="優先度", default=0)
+    attempts = models.PositiveIntegerField(verbose_name="試行回数", default=0)
+    max_attempts = models.PositiveIntegerField(verbose_name="最大試行回数", default=3)
+    # リトライ時はバックオフした日時を設定する
+    run_after = models.DateTimeField(verbose_name="実行予定日時", default=timezone.now)
+    result = models.JSONField(verbose_name="実行結果", null=True, blank=True)
+    error = models.TextField(verbose_name="エラー内容", blank=True, default="")
+    created_at = models.DateTimeField(verbose_name="登録日時", auto_now_add=True)
+    started_at = models.DateTimeField(verbose_name="開始日時", null=True, blank=True)
+    # 実行中はワーカが定期的に更新する。途絶えたジョブは再実行の対象にする
+    heartbeat_at = models.DateTimeField(
+        verbose_name="生存確認日時", null=True, blank=True
+    )
+    finished_at = models.DateTimeField(verbose_name="終了日時", null=True, blank=True)
+
+    class Meta:
+        db_table = "job"
+        verbose_name = "ジョブ"
+        indexes = [  # noqa: RUF012
+            models.Index(
+                fields=["status", "-priority", "run_after"], name="job_queue_idx"
+            ),
+        ]
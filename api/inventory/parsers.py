@@ -0,0 +1,30 @@
+from typing import IO
+from typing import Any
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """MessagePack形式のパーサ
+
+    Timestamp型はタイムゾーン付きの日時として読み込む。
+    """
+
+    media_type = "application/msgpack"
+
+    def parse(
+        self,
+        stream: IO[bytes],
+        media_type: str | None = None,
+        parser_context: dict[str, Any] | None = None,
+    ) -> Any:  # noqa: ANN401
+        """MessagePackのデータを読み込む"""
+        try:
+            return msgpack.unpackb(stream.read(), timestamp=3)
+        except (ValueError, msgpack.UnpackException) as e:
+            # FormatError等はメッセージが空なので、例外の型で理由を示す
+            reason = str(e) or f"invalid data ({type(e).__name__})"
+            errmsg = f"MessagePack parse error - {reason}"
+            raise ParseError(errmsg) from e
@@ -0,0 +1,79 @@
+from api.inventory.jobs import enqueue
+from api.inventory.models import Job
+from api.inventory.models import OpeningBalance
+from api.inventory.models import Product
+from api.inventory.models import Purchase
+from api.inventory.models import PurchaseArchive
+from api.inventory.models import Sales
+from api.inventory.models import SalesArchive
+
+# 商品に紐づく、物理削除で消す台帳
+LEDGER_MODELS = (Purchase, Sales, PurchaseArchive, SalesArchive, OpeningBalance)
+
+
+def soft_delete_products(product_ids: list[int]) -> tuple[int, Job | None]:
+    """商品を論理削除し、台帳の物理削除をジョブに登録する
+
+    台帳の多い商品を product.delete() で消すと、関連する仕入・売上をまとめて
+    削除する間ロックを取り続けるので、リクエストでは論理削除だけを行う。
+
+    Args:
+        product_ids (list[int]): 削除する商品のid
+
+    Returns:
+        tuple[int, Job | None]: 論理削除した件数と、登録した物理削除のジョブ
+    """
+    deleted = Product.objects.filter(pk__in=product_ids).update(is_active=False)
+    if not deleted:
+        return 0, None
+    return deleted, enqueue("purge_products", {"ids": list(product_ids)})
+
+
+def purge_products(product_ids: list[int], chunk_size: int = 1000) -> dict[str, int]:
+    """論理削除済みの商品と、その仕入・売上を物理削除する
+
+    台帳毎に、商品idのインデックスで chunk_size 件ずつidを選んで削除し、
+    1回の削除で長時間ロックを取らないようにする。
+    台帳が空になってから商品を削除するので、商品の削除で連鎖削除は発生しない。
+
+    Args:
+        product_ids (list[int]): 物理削除する商品のid。有効な商品は対象外
+        chunk_size (int, optional): 1回のDELETEで消す件数
+
+    Returns:
+        dict[str, int]: テーブル毎の削除件数
+    """
+    product_ids = list(
+        Product.all_objects.filter(pk__in=product_ids, is_active=False).values_list(
+            "id", flat=True
+        )
+    )
+    result = {}
+    for model in LEDGER_MODELS:
+        result[model._meta.db_table] = _delete_in_chunks(  # noqa: SLF001
+            model, product_ids, chunk_size
+        )
+    result[Product._meta.db_table], _ = Product.all_objects.filter(  # noqa: SLF001
+        pk__in=product_ids, is_active=False
+    ).delete()
+    return result
+
+
+def _delete_in_chunks(model: type, product_ids: list[int], chunk_size: int) -> int:
+    """商品に紐づく行をchunk_size件ずつ削除する
+
+    台帳は他から参照されないので、Djangoは行を読み込まずに
+    `DELETE ... WHERE id IN (...)` を1回発行するだけで削除する。
+    同じidを2回削除しても問題ないので、チャンク毎のトランザクションは張らない。
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            model.objects.filter(product_id__in=product_ids)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        count, _ = model.objects.filter(id__in=ids).delete()
+        deleted += count
@@ -0,0 +1,72 @@
+import datetime
+import decimal
+import uuid
+from typing import Any
+
+import msgpack
+from django.db.models import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack形式のレンダラ
+
+    タイムゾーン付きの日時はMessagePackのTimestamp型で出力する。
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: Any,  # noqa: ANN401
+        accepted_media_type: str | None = None,
+        renderer_context: dict[str, Any] | None = None,
+    ) -> bytes:
+        """データをMessagePackに変換する"""
+        if data is None:
+            return b""
+        response = (renderer_context or {}).get("response")
+        if response is not None and response.exception:
+            # リストの入力エラーは添字がキーになるので、JSONと同じく文字列にする
+            data = _stringify_keys(data)
+        return msgpack.packb(data, default=_encode, datetime=True)
+
+
+def _stringify_keys(data: Any) -> Any:  # noqa: ANN401
+    """辞書のキーを再帰的に文字列にする"""
+    if isinstance(data, dict):
+        return {str(key): _stringify_keys(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_stringify_keys(value) for value in data]
+    return data
+
+
+def _encode(obj: Any) -> Any:  # noqa: ANN401, PLR0911
+    """MessagePackが直接扱えない値を変換する
+
+    DRFのJSONEncoderに合わせる。
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.datetime | datetime.date | datetime.time):
+        # タイムゾーン無しの日時はTimestamp型にできないので文字列にする
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "__iter__"):
+        return list(obj)
+    errmsg = f"MessagePackに変換できない型です: {type(obj).__name__}"
+    raise TypeError(errmsg)
@@ -0,0 +1,229 @@
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.db.models import Sum
+from django.utils import timezone
+
+from api.inventory.models import OpeningBalance
+from api.inventory.models import Product
+from api.inventory.models import Purchase
+from api.inventory.models import PurchaseArchive
+from api.inventory.models import Sales
+from api.inventory.models import SalesArchive
+
+# ReorderState の属性を変えた場合は、古いキャッシュを読まないよう末尾の版を上げる
+CACHE_KEY = "inventory:reorder:state:v2"
+
+
+@dataclass
+class ReorderState:
+    """発注レポートの集計状態
+
+    商品毎の在庫数と、集計期間内の売上数量を保持する。
+    仕入・売上は追記のみで、アーカイブしても在庫数は変わらないので、
+    前回集計した最大idより後の行だけを足し込めば全件を集計し直したのと同じ結果になる。
+    built_at は全件集計し直す時期の判定に、refreshed_at はレポートの集計日時に使う。
+    """
+
+    built_at: datetime.datetime
+    refreshed_at: datetime.datetime
+    window_start: datetime.date
+    last_purchase_id: int
+    last_sales_id: int
+    stock: dict[int, int]
+    window_sales: dict[int, int]
+
+
+def get_reorder_report(
+    threshold_days: float, *, include_all: bool = False
+) -> dict[str, Any]:
+    """在庫切れまでの日数を推定し、発注が必要な商品を抽出する
+
+    直近 REORDER_WINDOW_DAYS 日の売上から1日あたりの販売数を求め、
+    現在の在庫数を割って在庫切れまでの日数とする。
+
+    Args:
+        threshold_days (float): 在庫切れまでの日数がこれ以下なら発注対象とする
+        include_all (bool, optional): 発注対象以外の商品も返すか
+
+    Returns:
+        dict: 集計日時、集計期間、しきい値と商品毎の結果
+    """
+    state = load_reorder_state()
+    window_days = settings.REORDER_WINDOW_DAYS
+
+    items = []
+    for product_id, name in Product.objects.values_list("id", "name").iterator():
+        stock = state.stock.get(product_id, 0)
+        daily = state.window_sales.get(product_id, 0) / window_days
+        if stock <= 0:
+            days_left = 0.0
+        elif daily > 0:
+            days_left = stock / daily
+        else:
+            days_left = None
+        reorder = days_left is not None and days_left <= threshold_days
+        if reorder or include_all:
+            items.append(
+                {
+                    "product": product_id,
+                    "name": name,
+                    "stock": stock,
+                    "daily_sales": round(daily, 3),
+                    "days_until_stockout": (
+                        None if days_left is None else round(days_left, 1)
+                    ),
+                    "reorder": reorder,
+                }
+            )
+
+    # 在庫切れが近い順。売れていない商品は最後にする
+    items.sort(
+        key=lambda item: (
+            item["days_until_stockout"] is None,
+            item["days_until_stockout"] or 0,
+        )
+    )
+    return {
+        "generated_at": state.refreshed_at,
+        "window_days": window_days,
+        "threshold_days": threshold_days,
+        "items": items,
+    }
+
+
+def load_reorder_state() -> ReorderState:
+    """キャッシュ済みの集計状態を差分更新して返す
+
+    キャッシュが無い場合、日付が変わって集計期間がずれた場合、
+    前回の全件集計から REORDER_REBUILD_INTERVAL 秒経った場合は全件を集計し直す。
+    コミット順がid順と前後した行の取りこぼしも、全件集計の時点で解消する。
+    """
+    state: ReorderState | None = cache.get(CACHE_KEY)
+    rebuild_before = timezone.now() - datetime.timedelta(
+        seconds=settings.REORDER_REBUILD_INTERVAL
+    )
+    if (
+        state is None
+        or state.window_start != _window_start()
+        or state.built_at < rebuild_before
+    ):
+        state = build_reorder_state()
+    else:
+        _refresh(state)
+    cache.set(CACHE_KEY, state, None)
+    return state
+
+
+def build_reorder_state() -> ReorderState:
+    """全商品の在庫数と集計期間内の売上数量を集計する
+
+    商品毎にクエリを発行せず、台帳毎に商品でGROUP BYした1回のクエリで集計する。
+    """
+    window_since = _start_of(_window_start())
+    stock: dict[int, int] = defaultdict(int)
+    window_sales: dict[int, int] = defaultdict(int)
+    # アーカイブと並行しても繰越在庫と台帳を同じ時点で読めるよう、1トランザクションで読む
+    with transaction.atomic():
+        # 集計中に登録された行を二重に数えないよう、先に上限のidを決める。
+        # アーカイブはidを引き継ぐので、アーカイブ済みの行も含めた最大idにする
+        last_purchase_id = max(_max_id(Purchase), _max_id(PurchaseArchive))
+        last_sales_id = max(_max_id(Sales), _max_id(SalesArchive))
+
+        for product_id, quantity in OpeningBalance.objects.values_list(
+            "product_id", "quantity"
+        ):
+            stock[product_id] += quantity
+        for product_id, quantity in _sum_by_product(
+            Purchase.objects.filter(id__lte=last_purchase_id)
+        ):
+            stock[product_id] += quantity
+        sales = Sales.objects.filter(id__lte=last_sales_id)
+        for product_id, quantity in _sum_by_product(sales):
+            stock[product_id] -= quantity
+
+        for queryset in (sales, SalesArchive.objects.filter(id__lte=last_sales_id)):
+            for product_id, quantity in _sum_by_product(
+                queryset.filter(sales_date__gte=window_since)
+            ):
+                window_sales[product_id] += quantity
+
+    built_at = timezone.now()
+    return ReorderState(
+        built_at=built_at,
+        refreshed_at=built_at,
+        window_start=_window_start(),
+        last_purchase_id=last_purchase_id,
+        last_sales_id=last_sales_id,
+        stock=dict(stock),
+        window_sales=dict(window_sales),
+    )
+
+
+def _refresh(state: ReorderState) -> None:
+    """前回集計以降に登録された仕入・売上だけを足し込む
+
+    前回集計の後に登録され、既にアーカイブされた行は台帳に無く繰越在庫に含まれるので、
+    アーカイブテーブルからも前回の最大idより後の行を読む。
+    """
+    window_since = _start_of(state.window_start)
+    with transaction.atomic():
+        last_purchase_id = max(_max_id(Purchase), _max_id(PurchaseArchive))
+        last_sales_id = max(_max_id(Sales), _max_id(SalesArchive))
+
+        for model in (Purchase, PurchaseArchive):
+            new_rows = model.objects.filter(
+                id__gt=state.last_purchase_id, id__lte=last_purchase_id
+            )
+            for product_id, quantity in _sum_by_product(new_rows):
+                state.stock[product_id] = state.stock.get(product_id, 0) + quantity
+
+        for model in (Sales, SalesArchive):
+            new_rows = model.objects.filter(
+                id__gt=state.last_sales_id, id__lte=last_sales_id
+            )
+            for product_id, quantity in _sum_by_product(new_rows):
+                state.stock[product_id] = state.stock.get(product_id, 0) - quantity
+            for product_id, quantity in _sum_by_product(
+                new_rows.filter(sales_date__gte=window_since)
+            ):
+                state.window_sales[product_id] = (
+                    state.window_sales.get(product_id, 0) + quantity
+                )
+
+    state.last_purchase_id = last_purchase_id
+    state.last_sales_id = last_sales_id
+    state.refreshed_at = timezone.now()
+
+
+def _window_start() -> datetime.date:
+    """集計期間の初日"""
+    return timezone.localdate() - datetime.timedelta(
+        days=settings.REORDER_WINDOW_DAYS - 1
+    )
+
+
+def _start_of(day: datetime.date) -> datetime.datetime:
+    """日付の0時"""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _max_id(model: type[Model]) -> int:
+    return model.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+
+def _sum_by_product(queryset: QuerySet) -> list[tuple[int, int]]:
+    return list(
+        queryset.order_by()
+        .values("product_id")
+        .annotate(quantity_sum=Sum("quantity"))
+        .values_list("product_id", "quantity_sum")
+    )
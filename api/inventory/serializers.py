@@ -1,5 +1,17 @@
+import datetime
+from typing import Any
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from api.inventory.batch import METHODS
+from api.inventory.jobs import get_payload_serializer
+from api.inventory.jobs import get_task_names
+from api.inventory.last_login import record_login
+from api.inventory.models import Job
 from api.inventory.models import Product
 from api.inventory.models import Purchase
 from api.inventory.models import Sales
@@ -24,7 +36,18 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = "__all__"
+        # 履歴バージョンと論理削除フラグは内部用なので公開しない
+        exclude = ("history_version", "history_updated_at", "is_active")
+
+
+class ProductBulkDeleteSerializer(serializers.Serializer):
+    """商品の一括削除のシリアライザ"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PRODUCT_BULK_DELETE_MAX,
+    )
 
 
 class PurchaseSerializer(serializers.ModelSerializer):
@@ -41,3 +64,127 @@ class SalesSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sales
         fields = "__all__"
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """ログインのシリアライザ
+
+    最終ログイン日時の更新を書き込みバッファ経由で行う
+    """
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
+        """ユーザを認証してトークンを発行し、最終ログイン日時を記録する"""
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """ジョブの状態のシリアライザ"""
+
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "name",
+            "status",
+            "priority",
+            "attempts",
+            "max_attempts",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "heartbeat_at",
+            "finished_at",
+        )
+
+
+class JobCreateSerializer(serializers.Serializer):
+    """ジョブ登録のシリアライザ"""
+
+    name = serializers.ChoiceField(choices=())
+    payload = serializers.DictField(default=dict)
+    priority = serializers.IntegerField(default=0)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """初期化処理。登録済みのジョブ名だけを受け付ける"""
+        super().__init__(*args, **kwargs)
+        self.fields["name"].choices = get_task_names()
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """ジョブにシリアライザが登録されていれば payload を検証する
+
+        ワーカで実行してから引数の誤りで失敗しないよう、登録時に400を返す。
+        """
+        payload_serializer_class = get_payload_serializer(attrs["name"])
+        if payload_serializer_class is None:
+            return attrs
+        payload_serializer = payload_serializer_class(data=attrs["payload"])
+        if not payload_serializer.is_valid():
+            raise serializers.ValidationError({"payload": payload_serializer.errors})
+        attrs["payload"] = payload_serializer.data
+        return attrs
+
+
+class ArchiveLedgerPayloadSerializer(serializers.Serializer):
+    """アーカイブの条件のシリアライザ
+
+    `archive_ledger` のジョブとコマンドで共通に使う。
+    before と days はどちらか一方を指定する。
+    """
+
+    before = serializers.DateField(required=False)
+    days = serializers.IntegerField(required=False, min_value=1)
+    chunk_size = serializers.IntegerField(default=1000, min_value=1)
+
+    def validate_before(self, value: datetime.date) -> datetime.date:
+        """未来の日付で全件をアーカイブしないようにする"""
+        if value > timezone.localdate():
+            errmsg = "未来の日付は指定できません。"
+            raise serializers.ValidationError(errmsg)
+        return value
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """引数は before と days のどちらか一方だけを受け付ける"""
+        if ("before" in attrs) == ("days" in attrs):
+            errmsg = "before と days のどちらか一方を指定してください。"
+            raise serializers.ValidationError(errmsg)
+        return attrs
+
+
+class PurgeProductsPayloadSerializer(serializers.Serializer):
+    """商品の物理削除のジョブの引数のシリアライザ"""
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    chunk_size = serializers.IntegerField(default=1000, min_value=1)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """バッチに含める1件のリクエストのシリアライザ"""
+
+    method = serializers.ChoiceField(choices=METHODS)
+    path = serializers.RegexField(r"^/api/inventory/")
+    # MessagePackで受け取った日時もそのまま受け付ける
+    body = serializers.JSONField(required=False, default=None, encoder=JSONEncoder)
+    headers = serializers.DictField(child=serializers.CharField(), default=dict)
+
+
+class BatchSerializer(serializers.Serializer):
+    """バッチリクエストのシリアライザ"""
+
+    requests = serializers.ListField(
+        child=BatchItemSerializer(),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_REQUESTS,
+    )
+    parallel = serializers.BooleanField(default=False)
+
+
+class ReorderQuerySerializer(serializers.Serializer):
+    """発注レポートの検索条件のシリアライザ"""
+
+    threshold = serializers.FloatField(
+        default=settings.REORDER_THRESHOLD_DAYS, min_value=0
+    )
+    all = serializers.BooleanField(default=False)
@@ -0,0 +1,54 @@
+import dataclasses
+from typing import Any
+
+from django.core.cache import cache
+
+from api.inventory.archive import archive_ledger
+from api.inventory.archive import get_cutoff
+from api.inventory.jobs import task
+from api.inventory.purge import purge_products
+from api.inventory.reorder import CACHE_KEY as REORDER_CACHE_KEY
+from api.inventory.reorder import build_reorder_state
+from api.inventory.serializers import ArchiveLedgerPayloadSerializer
+from api.inventory.serializers import PurgeProductsPayloadSerializer
+
+
+@task("archive_ledger", ArchiveLedgerPayloadSerializer)
+def archive_ledger_task(payload: dict[str, Any]) -> dict[str, int]:
+    """古い仕入・売上をアーカイブするジョブ
+
+    payload:
+        before (str): この日付(YYYY-MM-DD)より前を移す
+        days (int): before が無い場合、この日数より前を移す
+        chunk_size (int, optional): 1トランザクションの件数
+    """
+    serializer = ArchiveLedgerPayloadSerializer(data=payload)
+    serializer.is_valid(raise_exception=True)
+    options = serializer.validated_data
+    cutoff = get_cutoff(options.get("before"), options.get("days"))
+    result = archive_ledger(cutoff, chunk_size=options["chunk_size"])
+    return dataclasses.asdict(result)
+
+
+@task("rebuild_reorder_state")
+def rebuild_reorder_state_task(_: dict[str, Any]) -> dict[str, int]:
+    """発注レポートの集計状態を全件集計し直すジョブ
+
+    リクエスト時の全件集計を避けたい場合に定期的に登録する。
+    """
+    state = build_reorder_state()
+    cache.set(REORDER_CACHE_KEY, state, None)
+    return {"products": len(state.stock)}
+
+
+@task("purge_products", PurgeProductsPayloadSerializer)
+def purge_products_task(payload: dict[str, Any]) -> dict[str, int]:
+    """論理削除した商品と、その仕入・売上を物理削除するジョブ
+
+    payload:
+        ids (list[int]): 商品のid
+        chunk_size (int, optional): 1回のDELETEで消す件数
+    """
+    return purge_products(
+        payload["ids"], chunk_size=int(payload.get("chunk_size", 1000))
+    )
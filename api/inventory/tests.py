@@ -1 +1,745 @@
-# Create your tests here.
+import datetime
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.models import Sum
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.test import APITransactionTestCase
+
+from api.inventory.archive import archive_ledger
+from api.inventory.jobs import _handle_failure
+from api.inventory.jobs import claim_next_job
+from api.inventory.jobs import enqueue
+from api.inventory.jobs import run_job
+from api.inventory.jobs import task
+from api.inventory.last_login import LastLoginBuffer
+from api.inventory.last_login import record_login
+from api.inventory.models import Job
+from api.inventory.models import OpeningBalance
+from api.inventory.models import Product
+from api.inventory.models import Purchase
+from api.inventory.models import PurchaseArchive
+from api.inventory.models import Sales
+from api.inventory.models import SalesArchive
+from api.inventory.purge import LEDGER_MODELS
+from api.inventory.purge import purge_products
+from api.inventory.purge import soft_delete_products
+from api.inventory.reorder import _refresh
+from api.inventory.reorder import build_reorder_state
+from api.inventory.views import InventoryView
+
+
+class LastLoginBufferTests(TestCase):
+    """最終ログイン日時の書き込みバッファのテスト
+
+    書き込みスレッドは起動せず、flush を直接呼ぶ。
+    """
+
+    def setUp(self) -> None:
+        """ログインするユーザを作成する"""
+        patcher = mock.patch.object(LastLoginBuffer, "_ensure_worker")
+        self.ensure_worker = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = [User.objects.create_user(f"user{i}") for i in range(2)]
+        self.buffer = LastLoginBuffer()
+
+    def test_flush_writes_latest_login_in_one_update(self) -> None:
+        """ユーザ毎に最新のログイン日時だけを1回のUPDATEで書き込む"""
+        first, second = self.users
+        self.buffer.record(first)
+        self.buffer.record(second)
+        self.buffer.record(first)
+
+        with CaptureQueriesContext(connection) as queries:
+            updated = self.buffer.flush()
+
+        self.assertEqual(updated, 2)
+        updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        for user in self.users:
+            self.assertEqual(User.objects.get(pk=user.pk).last_login, user.last_login)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_keeps_pending_logins(self) -> None:
+        """書き込みに失敗した分は次の flush で書き込む"""
+        user = self.users[0]
+        self.buffer.record(user)
+
+        with (
+            mock.patch.object(
+                User.objects, "bulk_update", side_effect=RuntimeError("失敗")
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            self.buffer.flush()
+        self.assertIsNone(User.objects.get(pk=user.pk).last_login)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(User.objects.get(pk=user.pk).last_login, user.last_login)
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=0)
+    def test_record_login_without_interval_updates_immediately(self) -> None:
+        """LAST_LOGIN_FLUSH_INTERVAL が0の場合はバッファを使わずに書き込む"""
+        user = self.users[0]
+
+        record_login(user)
+
+        self.assertIsNotNone(User.objects.get(pk=user.pk).last_login)
+        self.ensure_worker.assert_not_called()
+
+
+class HistoryETagTests(APITestCase):
+    """在庫履歴のETagと条件付きリクエストのテスト"""
+
+    def setUp(self) -> None:
+        """仕入・売上を持つ商品を作成する"""
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user("staff"))
+        self.product = Product.objects.create(name="商品", price=100)
+        now = timezone.now()
+        old = now - datetime.timedelta(days=100)
+        Purchase.objects.create(product=self.product, quantity=10, purchase_date=old)
+        Sales.objects.create(product=self.product, quantity=3, sales_date=now)
+        self.url = f"/api/inventory/inventories/{self.product.pk}/"
+
+    def _assert_modified(self, etag: str) -> str:
+        """古いETagで条件付きリクエストをすると200と新しいETagが返る"""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        return response["ETag"]
+
+    def test_matching_etag_returns_304_without_query(self) -> None:
+        """ETagが一致すれば履歴を取得せずに304を返す"""
+        etag = self.client.get(self.url)["ETag"]
+
+        with mock.patch.object(InventoryView, "_get_history") as get_history:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        get_history.assert_not_called()
+
+    def test_writes_change_etag(self) -> None:
+        """仕入・売上の登録と商品の更新の後は新しいETagで200を返す"""
+        etag = self.client.get(self.url)["ETag"]
+        now = timezone.now()
+
+        self.client.post(
+            "/api/inventory/purchases/",
+            {"product": self.product.pk, "quantity": 5, "purchase_date": now},
+        )
+        etag = self._assert_modified(etag)
+
+        self.client.post(
+            "/api/inventory/sales/",
+            {"product": self.product.pk, "quantity": 1, "sales_date": now},
+        )
+        etag = self._assert_modified(etag)
+
+        response = self.client.put(
+            f"/api/inventory/products/{self.product.pk}/",
+            {"name": "商品", "price": 120},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self._assert_modified(etag)
+        self.assertEqual(self.client.get(self.url).data[0]["unit"], 120)
+
+    def test_etag_differs_by_format(self) -> None:
+        """JSONとMessagePackでETagを分け、Accept で Vary する"""
+        json_response = self.client.get(self.url)
+        msgpack_response = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(msgpack_response["Content-Type"], "application/msgpack")
+        self.assertNotEqual(json_response["ETag"], msgpack_response["ETag"])
+        self.assertIn("Accept", json_response["Vary"])
+        response = self.client.get(
+            self.url,
+            HTTP_ACCEPT="application/msgpack",
+            HTTP_IF_NONE_MATCH=json_response["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_archived_history_is_cached_separately(self) -> None:
+        """archived=true と既定の履歴でETagとキャッシュを共有しない"""
+        archive_ledger(timezone.now() - datetime.timedelta(days=30))
+
+        hot = self.client.get(self.url)
+        archived = self.client.get(self.url, {"archived": "true"})
+
+        self.assertNotEqual(hot["ETag"], archived["ETag"])
+        self.assertEqual([row["type"] for row in hot.data], [0, 2])
+        self.assertEqual([row["type"] for row in archived.data], [1, 2])
+        response = self.client.get(
+            self.url, {"archived": "true"}, HTTP_IF_NONE_MATCH=hot["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # キャッシュから返しても、それぞれの履歴のまま
+        self.assertEqual(self.client.get(self.url).data, hot.data)
+        self.assertEqual(
+            self.client.get(self.url, {"archived": "true"}).data, archived.data
+        )
+
+
+class MessagePackParserTests(APITestCase):
+    """MessagePackのパーサのテスト"""
+
+    def setUp(self) -> None:
+        """APIを呼び出すユーザで認証する"""
+        self.client.force_authenticate(User.objects.create_user("staff"))
+
+    def test_malformed_body_returns_reason(self) -> None:
+        """読み込めないデータは理由を示して400を返す"""
+        for body, reason in (
+            (b"\xc1", "invalid data (FormatError)"),
+            (b"\x92\x01", "Unpack failed: incomplete input"),
+        ):
+            response = self.client.generic(
+                "POST",
+                "/api/inventory/products/",
+                body,
+                content_type="application/msgpack",
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                response.data["detail"], f"MessagePack parse error - {reason}"
+            )
+
+
+class ArchiveLedgerTests(APITestCase):
+    """仕入・売上のアーカイブのテスト"""
+
+    def setUp(self) -> None:
+        """古い仕入・売上と最近の仕入・売上を持つ商品を作成する"""
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user("staff"))
+        self.product = Product.objects.create(name="商品", price=100)
+        now = timezone.now()
+        old = now - datetime.timedelta(days=100)
+        for days, quantity in ((0, 10), (1, 5)):
+            Purchase.objects.create(
+                product=self.product,
+                quantity=quantity,
+                purchase_date=old + datetime.timedelta(days=days),
+            )
+        Sales.objects.create(
+            product=self.product,
+            quantity=3,
+            sales_date=old + datetime.timedelta(days=2),
+        )
+        Purchase.objects.create(product=self.product, quantity=7, purchase_date=now)
+        Sales.objects.create(product=self.product, quantity=2, sales_date=now)
+        self.cutoff = now - datetime.timedelta(days=30)
+        self.url = f"/api/inventory/inventories/{self.product.pk}/"
+
+    def _stock(self) -> int:
+        """繰越在庫と台帳から在庫数を求める"""
+
+        def total(queryset: QuerySet) -> int:
+            return queryset.aggregate(total=Sum("quantity"))["total"] or 0
+
+        return (
+            total(OpeningBalance.objects.filter(product=self.product))
+            + total(Purchase.objects.filter(product=self.product))
+            - total(Sales.objects.filter(product=self.product))
+        )
+
+    def test_stock_is_unchanged(self) -> None:
+        """チャンクを小さくしてアーカイブしても在庫数が変わらない"""
+        self.assertEqual(self._stock(), 17)
+
+        result = archive_ledger(self.cutoff, chunk_size=1)
+
+        self.assertEqual((result.purchases, result.sales), (2, 1))
+        self.assertEqual(PurchaseArchive.objects.count(), 2)
+        self.assertEqual(SalesArchive.objects.count(), 1)
+        self.assertEqual(self._stock(), 17)
+
+        # 売上登録時の在庫チェックも繰越在庫を含めて判定する
+        over = self.client.post(
+            "/api/inventory/sales/",
+            {"product": self.product.pk, "quantity": 18, "sales_date": timezone.now()},
+        )
+        self.assertEqual(over.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        exact = self.client.post(
+            "/api/inventory/sales/",
+            {"product": self.product.pk, "quantity": 17, "sales_date": timezone.now()},
+        )
+        self.assertEqual(exact.status_code, status.HTTP_201_CREATED)
+
+    def test_stock_check_is_consistent_during_archive(self) -> None:
+        """在庫チェックの途中でアーカイブがコミットされても二重に数えない"""
+        archived = []
+
+        def archive_after_ledger_read(
+            execute: object,
+            sql: str,
+            params: object,
+            many: bool,  # noqa: FBT001
+            context: object,
+        ) -> object:
+            result = execute(sql, params, many, context)
+            if not archived and sql.startswith("SELECT") and '"purchase"' in sql:
+                archived.append(sql)
+                archive_ledger(self.cutoff, chunk_size=1)
+            return result
+
+        with connection.execute_wrapper(archive_after_ledger_read):
+            response = self.client.post(
+                "/api/inventory/sales/",
+                {
+                    "product": self.product.pk,
+                    "quantity": 18,
+                    "sales_date": timezone.now(),
+                },
+            )
+
+        self.assertTrue(archived)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(self._stock(), 17)
+
+    def test_history_shows_opening_balance(self) -> None:
+        """アーカイブ済みの分は繰越在庫の1行にまとめて返す"""
+        archive_ledger(self.cutoff, chunk_size=1)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        opening = [row for row in response.data if row["type"] == 0]
+        self.assertEqual(len(opening), 1)
+        self.assertEqual(opening[0]["quantity"], 12)
+        self.assertEqual(
+            sorted((row["type"], row["quantity"]) for row in response.data),
+            [(0, 12), (1, 7), (2, 2)],
+        )
+
+    def test_history_with_archived_returns_original_rows(self) -> None:
+        """archived=true でアーカイブ前と同じ仕入・売上を返す"""
+        before = self.client.get(self.url, {"archived": "true"}).data
+        archive_ledger(self.cutoff, chunk_size=1)
+
+        response = self.client.get(self.url, {"archived": "true"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data, before)
+
+
+class BatchTests(APITestCase):
+    """バッチAPIのテスト"""
+
+    url = "/api/inventory/batch/"
+
+    def setUp(self) -> None:
+        """バッチを呼び出すユーザで認証する"""
+        self.client.force_authenticate(User.objects.create_user("staff"))
+        self.product = Product.objects.create(name="商品", price=100)
+
+    def _batch(self, *items: dict, parallel: bool = False) -> list[dict]:
+        response = self.client.post(
+            self.url, {"requests": items, "parallel": parallel}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["responses"]
+
+    def test_sub_requests_inherit_user(self) -> None:
+        """個々のリクエストはバッチの認証済みユーザで実行する
+
+        ProductView は独自の認証クラスを持つが、再認証せずにユーザを引き継ぐ。
+        """
+        responses = self._batch(
+            {"method": "GET", "path": f"/api/inventory/products/{self.product.pk}/"},
+            {"method": "GET", "path": "/api/inventory/reorder/"},
+        )
+
+        self.assertEqual([r["status"] for r in responses], [status.HTTP_200_OK] * 2)
+        self.assertEqual(responses[0]["body"]["name"], "商品")
+
+    def test_unauthenticated_batch_is_rejected(self) -> None:
+        """バッチ自体が未認証なら実行しない"""
+        # セッションの無いAPIプロファイルでも動くよう、別のクライアントで呼ぶ
+        response = self.client_class().post(
+            self.url,
+            {"requests": [{"method": "GET", "path": "/api/inventory/products/"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_failing_item_is_rolled_back(self) -> None:
+        """例外が発生した1件は500になり、その変更だけをロールバックする"""
+        purchase = {
+            "product": self.product.pk,
+            "quantity": 5,
+            "purchase_date": timezone.now(),
+        }
+
+        with (
+            mock.patch(
+                "api.inventory.views.bump_history_version",
+                side_effect=RuntimeError("失敗"),
+            ),
+            self.assertLogs("api.inventory.batch", level="ERROR"),
+        ):
+            responses = self._batch(
+                {
+                    "method": "POST",
+                    "path": "/api/inventory/products/",
+                    "body": {"name": "新商品", "price": 200},
+                },
+                {
+                    "method": "POST",
+                    "path": "/api/inventory/purchases/",
+                    "body": purchase,
+                },
+                {"method": "GET", "path": "/api/inventory/products/"},
+            )
+
+        self.assertEqual(
+            [r["status"] for r in responses],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status.HTTP_200_OK,
+            ],
+        )
+        self.assertEqual(responses[1]["headers"], {})
+        self.assertFalse(Purchase.objects.exists())
+        self.assertTrue(Product.objects.filter(name="新商品").exists())
+        self.assertEqual(len(responses[2]["body"]), 2)
+
+    def test_nested_batch_and_unknown_path(self) -> None:
+        """バッチの中のバッチは400、存在しないパスは404の結果にする"""
+        responses = self._batch(
+            {"method": "POST", "path": self.url, "body": {"requests": []}},
+            {"method": "GET", "path": "/api/inventory/unknown/"},
+        )
+
+        self.assertEqual(
+            [r["status"] for r in responses],
+            [status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND],
+        )
+
+
+class ParallelBatchTests(APITransactionTestCase):
+    """バッチAPIの並列実行のテスト
+
+    並列実行では別スレッドの接続で読むので、テストをトランザクションで囲まない。
+    """
+
+    def test_parallel_keeps_request_order(self) -> None:
+        """並列に実行してもリクエストと同じ順で結果を返す"""
+        self.client.force_authenticate(User.objects.create_user("staff"))
+        products = [Product.objects.create(name=f"商品{i}", price=i) for i in range(10)]
+        items = [
+            {"method": "GET", "path": f"/api/inventory/products/{product.pk}/"}
+            for product in reversed(products)
+        ]
+
+        response = self.client.post(
+            "/api/inventory/batch/",
+            {"requests": items, "parallel": True},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r["body"]["id"] for r in response.data["responses"]],
+            [product.pk for product in reversed(products)],
+        )
+
+
+class ReorderStateTests(TestCase):
+    """発注レポートの集計状態のテスト"""
+
+    def setUp(self) -> None:
+        """仕入・売上を持つ商品を作成する"""
+        self.now = timezone.now()
+        self.products = [
+            Product.objects.create(name=f"商品{i}", price=100) for i in range(3)
+        ]
+        for product in self.products:
+            self._ledger(product, purchased=50, sold=5, days_ago=60)
+            self._ledger(product, purchased=20, sold=3, days_ago=1)
+
+    def _ledger(
+        self, product: Product, *, purchased: int, sold: int, days_ago: int
+    ) -> None:
+        date = self.now - datetime.timedelta(days=days_ago)
+        Purchase.objects.create(product=product, quantity=purchased, purchase_date=date)
+        Sales.objects.create(product=product, quantity=sold, sales_date=date)
+
+    def test_refresh_matches_full_build(self) -> None:
+        """差分更新の結果が、アーカイブを挟んでも全件集計と一致する"""
+        state = build_reorder_state()
+        new_product = Product.objects.create(name="新商品", price=100)
+        for product in [*self.products[:2], new_product]:
+            # 集計後に登録され、refresh の前にアーカイブされる行と、台帳に残る行
+            self._ledger(product, purchased=30, sold=7, days_ago=45)
+            self._ledger(product, purchased=10, sold=4, days_ago=2)
+        archive_ledger(self.now - datetime.timedelta(days=30), chunk_size=2)
+        self.assertTrue(SalesArchive.objects.filter(id__gt=state.last_sales_id))
+
+        refreshed_at = state.refreshed_at
+        _refresh(state)
+
+        expected = build_reorder_state()
+        self.assertEqual(state.stock, expected.stock)
+        self.assertEqual(state.window_sales, expected.window_sales)
+        self.assertEqual(state.last_purchase_id, expected.last_purchase_id)
+        self.assertEqual(state.last_sales_id, expected.last_sales_id)
+        self.assertGreater(state.refreshed_at, refreshed_at)
+        self.assertEqual(state.stock[new_product.pk], 29)
+        self.assertEqual(state.window_sales[new_product.pk], 4)
+
+
+@task("test_echo")
+def _echo_task(payload: dict) -> dict:
+    return payload
+
+
+@task("test_unserializable_result")
+def _unserializable_result_task(_: dict) -> datetime.datetime:
+    return timezone.now()
+
+
+@override_settings(JOB_RETRY_BACKOFF=10, JOB_RUNNING_TIMEOUT=60)
+class JobTests(TestCase):
+    """バックグラウンドジョブのテスト"""
+
+    def test_claim_next_job_claims_once(self) -> None:
+        """同じジョブは1度しか取り出せない"""
+        job = enqueue("test_echo", {"value": 1})
+
+        claimed = claim_next_job()
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, Job.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    def test_claim_next_job_skips_future_jobs(self) -> None:
+        """実行予定日時が来ていないジョブは取り出さない"""
+        job = enqueue("test_echo")
+        Job.objects.filter(pk=job.pk).update(
+            run_after=timezone.now() + datetime.timedelta(minutes=1)
+        )
+
+        self.assertIsNone(claim_next_job())
+
+    def test_claim_next_job_reclaims_stale_jobs(self) -> None:
+        """タイムアウトした実行中のジョブは、最大試行回数までは再実行する"""
+        stale_at = timezone.now() - datetime.timedelta(seconds=61)
+        retry = enqueue("test_echo", max_attempts=2)
+        exhausted = enqueue("test_echo", max_attempts=1)
+        Job.objects.filter(pk__in=(retry.pk, exhausted.pk)).update(
+            status=Job.Status.RUNNING, attempts=1, heartbeat_at=stale_at
+        )
+
+        claimed = claim_next_job()
+
+        self.assertEqual(claimed.pk, retry.pk)
+        self.assertEqual(claimed.attempts, 2)
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, Job.Status.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+
+    def test_handle_failure_backs_off_exponentially(self) -> None:
+        """失敗の度に再実行までの間隔を2倍にし、最大試行回数で失敗にする"""
+        job = enqueue("test_echo", max_attempts=3)
+        error = RuntimeError("失敗")
+
+        for attempts, backoff in ((1, 10), (2, 20)):
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.RUNNING, attempts=attempts
+            )
+            job.refresh_from_db()
+            started = timezone.now()
+            _handle_failure(job, error)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.PENDING)
+            self.assertEqual(job.error, repr(error))
+            self.assertGreaterEqual(
+                job.run_after, started + datetime.timedelta(seconds=backoff)
+            )
+            self.assertLessEqual(
+                job.run_after, timezone.now() + datetime.timedelta(seconds=backoff)
+            )
+
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.RUNNING, attempts=3)
+        job.refresh_from_db()
+        _handle_failure(job, error)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_run_job_saves_result(self) -> None:
+        """成功したジョブの結果を保存する"""
+        enqueue("test_echo", {"value": 1})
+
+        run_job(claim_next_job())
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"value": 1})
+
+    def test_run_job_fails_when_result_cannot_be_saved(self) -> None:
+        """結果をJSONに変換できない場合は実行中のまま残さず、失敗として扱う"""
+        enqueue("test_unserializable_result", max_attempts=1)
+
+        with self.assertLogs("api.inventory.jobs", level="ERROR"):
+            run_job(claim_next_job())
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn("TypeError", job.error)
+
+    def test_reclaimed_job_is_not_overwritten_by_old_worker(self) -> None:
+        """タイムアウトで再実行されたジョブの状態を、元のワーカは更新しない"""
+        enqueue("test_echo", {"value": 1})
+        first = claim_next_job()
+        Job.objects.filter(pk=first.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=61)
+        )
+        second = claim_next_job()
+        self.assertEqual(second.attempts, 2)
+
+        with self.assertLogs("api.inventory.jobs", level="WARNING"):
+            run_job(first)
+        _handle_failure(first, RuntimeError("失敗"))
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNone(job.result)
+        self.assertNotIn("RuntimeError", job.error)
+
+
+@task("test_sleep")
+def _sleep_task(payload: dict) -> None:
+    time.sleep(payload["seconds"])
+
+
+@override_settings(JOB_HEARTBEAT_INTERVAL=0.01)
+class JobHeartbeatTests(TransactionTestCase):
+    """実行中のジョブの生存確認のテスト
+
+    生存確認は別スレッドの接続で更新するので、テストをトランザクションで囲まない。
+    """
+
+    def test_running_job_updates_heartbeat(self) -> None:
+        """実行中は生存確認を更新し続ける"""
+        enqueue("test_sleep", {"seconds": 0.2})
+        job = claim_next_job()
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertGreater(job.heartbeat_at, job.started_at)
+
+
+class ProductDeleteTests(APITestCase):
+    """商品の論理削除と物理削除のテスト"""
+
+    def setUp(self) -> None:
+        """アーカイブ済みの分を含む仕入・売上を持つ商品を作成する"""
+        self.client.force_authenticate(User.objects.create_user("staff"))
+        now = timezone.now()
+        old = now - datetime.timedelta(days=100)
+        self.products = [
+            Product.objects.create(name=f"商品{i}", price=100) for i in range(3)
+        ]
+        for product in self.products:
+            for date in (old, old, now, now, now):
+                Purchase.objects.create(product=product, quantity=5, purchase_date=date)
+                Sales.objects.create(product=product, quantity=1, sales_date=date)
+        archive_ledger(now - datetime.timedelta(days=30))
+
+    def _ledger_counts(self, product: Product) -> list[int]:
+        return [
+            model.objects.filter(product_id=product.pk).count()
+            for model in LEDGER_MODELS
+        ]
+
+    def test_deleted_product_is_hidden(self) -> None:
+        """論理削除した商品は一覧・詳細に出ず、仕入・売上にも使えない"""
+        product = self.products[0]
+        url = f"/api/inventory/products/{product.pk}/"
+
+        response = self.client.delete(url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        for list_url in ("/api/inventory/products/", "/api/inventory/products/model/"):
+            ids = [row["id"] for row in self.client.get(list_url).data]
+            self.assertNotIn(product.pk, ids)
+            self.assertIn(self.products[1].pk, ids)
+        now = timezone.now()
+        for path, date_field in (
+            ("purchases", "purchase_date"),
+            ("sales", "sales_date"),
+        ):
+            response = self.client.post(
+                f"/api/inventory/{path}/",
+                {"product": product.pk, "quantity": 1, date_field: now},
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("product", response.data)
+        self.assertTrue(Job.objects.filter(name="purge_products").exists())
+
+    def test_purge_removes_ledgers_then_products(self) -> None:
+        """小さなチャンクで全ての台帳と商品を削除し、有効な商品には触れない"""
+        deleted, active = self.products[:2], self.products[2]
+        self.assertEqual(self._ledger_counts(active), [3, 3, 2, 2, 1])
+        soft_delete_products([product.pk for product in deleted])
+
+        result = purge_products([product.pk for product in self.products], chunk_size=2)
+
+        self.assertEqual(
+            result,
+            {
+                "purchase": 6,
+                "sales": 6,
+                "purchase_archive": 4,
+                "sales_archive": 4,
+                "opening_balance": 2,
+                "product": 2,
+            },
+        )
+        for product in deleted:
+            self.assertEqual(self._ledger_counts(product), [0] * 5)
+            self.assertFalse(Product.all_objects.filter(pk=product.pk).exists())
+        self.assertEqual(self._ledger_counts(active), [3, 3, 2, 2, 1])
+        self.assertTrue(Product.objects.filter(pk=active.pk).exists())
+
+    def test_bulk_delete_returns_job(self) -> None:
+        """一括削除は物理削除のジョブを登録して202を返す"""
+        url = "/api/inventory/products/bulk_delete/"
+        ids = [self.products[0].pk, self.products[1].pk]
+
+        response = self.client.post(url, {"ids": ids}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["deleted"], 2)
+        self.assertEqual(response["Location"], response.data["job"]["url"])
+        job = Job.objects.get(pk=response.data["job"]["id"])
+        self.assertEqual((job.name, job.payload), ("purge_products", {"ids": ids}))
+
+        # 削除済みや存在しない商品だけの場合はジョブを登録しない
+        response = self.client.post(url, {"ids": [*ids, 9999]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"deleted": 0})
+        self.assertEqual(Job.objects.count(), 1)
@@ -11,6 +11,7 @@ urlpatterns = [
     path("token/refresh/", jwt_views.TokenRefreshView.as_view(), name="token_refresh"),
     path("products/", views.ProductView.as_view()),
     path("products/<int:_id>/", views.ProductView.as_view()),
+    path("products/bulk_delete/", views.ProductBulkDeleteView.as_view()),
     path(
         "products/model/",
         views.ProductModelViewSet.as_view({"get": "list", "post": "create"}),
@@ -18,4 +19,8 @@ urlpatterns = [
     path("inventories/<int:_id>/", views.InventoryView.as_view()),
     path("purchases/", views.PurchaseView.as_view()),
     path("sales/", views.SalesView.as_view()),
+    path("jobs/", views.JobView.as_view()),
+    path("jobs/<int:_id>/", views.JobView.as_view(), name="job_detail"),
+    path("batch/", views.BatchView.as_view(), name="batch"),
+    path("reorder/", views.ReorderView.as_view()),
 ]
@@ -3,9 +3,16 @@ from typing import ClassVar
 
 from django.conf import settings
 from django.db.models import F
+from django.db.models import Model
+from django.db.models import OuterRef
+from django.db.models import QuerySet
+from django.db.models import Subquery
 from django.db.models import Sum
 from django.db.models import Value
 from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework import views
 from rest_framework import viewsets
@@ -14,16 +21,33 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
+from api.inventory.batch import dispatch_batch
 from api.inventory.exception import BusinessException
+from api.inventory.history import bump_history_version
+from api.inventory.history import get_cached_history
+from api.inventory.history import get_history_etag
+from api.inventory.history import set_cached_history
+from api.inventory.jobs import enqueue
+from api.inventory.models import Job
+from api.inventory.models import OpeningBalance
 from api.inventory.models import Product
 from api.inventory.models import Purchase
+from api.inventory.models import PurchaseArchive
 from api.inventory.models import Sales
+from api.inventory.models import SalesArchive
+from api.inventory.purge import soft_delete_products
+from api.inventory.reorder import get_reorder_report
+from api.inventory.serializers import BatchSerializer
 from api.inventory.serializers import InventorySerializer
+from api.inventory.serializers import JobCreateSerializer
+from api.inventory.serializers import JobSerializer
+from api.inventory.serializers import LoginSerializer
+from api.inventory.serializers import ProductBulkDeleteSerializer
 from api.inventory.serializers import ProductSerializer
 from api.inventory.serializers import PurchaseSerializer
+from api.inventory.serializers import ReorderQuerySerializer
 from api.inventory.serializers import SalesSerializer
 
 
@@ -51,7 +75,7 @@ class LoginView(views.APIView):
         Returns:
             Response: レスポンス情報
         """
-        serializer = TokenObtainPairSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         access = serializer.validated_data.get("access", None)
         refresh = serializer.validated_data.get("refresh", None)
@@ -125,35 +149,76 @@ class InventoryView(views.APIView):
     """在庫操作に関する関数"""
 
     def get(self, request: Request, _id: int | None = None, format=None) -> Response:
-        """仕入れ、売上情報を取得する"""
+        """仕入れ、売上情報を取得する
+
+        商品の履歴バージョンをETagとして返し、If-None-Match等の条件付きリクエストで
+        変更が無ければ履歴を取得せずに304を返す。
+        クエリパラメータ archived=true でアーカイブ済みの仕入・売上も含める。
+        """
         if _id is None:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        purchase = (
-            Purchase.objects.filter(product_id=_id)
-            .prefetch_related("product")
-            .values(
-                "id",
-                "quantity",
-                type=Value("1"),
-                date=F("purchase_date"),
-                unit=F("product__price"),
-            )
+        product = (
+            Product.objects.filter(pk=_id)
+            .values("id", "price", "history_version", "history_updated_at")
+            .first()
         )
-        sales = (
-            Sales.objects.filter(product_id=_id)
-            .prefetch_related("product")
-            .values(
-                "id",
-                "quantity",
-                type=Value("2"),
-                date=F("sales_date"),
-                unit=F("product__price"),
-            )
+        if product is None:
+            return Response([], status=status.HTTP_200_OK)
+
+        include_archived = request.query_params.get("archived") in ("1", "true")
+        etag = get_history_etag(
+            product, request.accepted_renderer.format, include_archived=include_archived
+        )
+        # ETagはレスポンスの形式毎に異なるので、Acceptでキャッシュを分けさせる
+        headers = {"ETag": etag, "Vary": "Accept"}
+        last_modified = None
+        if product["history_updated_at"] is not None:
+            last_modified = int(product["history_updated_at"].timestamp())
+            headers["Last-Modified"] = http_date(last_modified)
+
+        conditional = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
         )
-        queryset = purchase.union(sales).order_by(F("date"))
+        if conditional is not None:
+            return Response(status=conditional.status_code, headers=headers)
+
+        data = get_cached_history(product, include_archived=include_archived)
+        if data is None:
+            data = self._get_history(_id, include_archived=include_archived)
+            set_cached_history(product, data, include_archived=include_archived)
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+    def _get_history(self, _id: int, *, include_archived: bool) -> list:
+        """仕入れ、売上情報を日時順に取得する
+
+        include_archived が偽の場合、アーカイブ済みの分は繰越在庫(type=0)の
+        1行にまとめて返す。真の場合はアーカイブ済みの仕入・売上をそのまま合わせて返す。
+        """
+        purchase = self._ledger_values(Purchase, _id, "1", "purchase_date")
+        sales = self._ledger_values(Sales, _id, "2", "sales_date")
+        if include_archived:
+            others = (
+                self._ledger_values(PurchaseArchive, _id, "1", "purchase_date"),
+                self._ledger_values(SalesArchive, _id, "2", "sales_date"),
+            )
+        else:
+            others = (self._ledger_values(OpeningBalance, _id, "0", "balance_date"),)
+        queryset = purchase.union(sales, *others).order_by(F("date"))
         serializer = InventorySerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
+
+    def _ledger_values(
+        self, model: type[Model], _id: int, _type: str, date_field: str
+    ) -> QuerySet:
+        """UNIONで結合できるよう、台帳の列を履歴の形式に揃える"""
+        return model.objects.filter(product_id=_id).values(
+            "id",
+            "quantity",
+            type=Value(_type),
+            date=F(date_field),
+            unit=F("product__price"),
+        )
 
 
 class ProductView(views.APIView):
@@ -203,15 +268,45 @@ class ProductView(views.APIView):
         serializer = self._serializer(product, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        # 価格は在庫履歴の単価に使われるので履歴バージョンを進める
+        bump_history_version(product.pk)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request: Request, _id: int, format=None) -> Response:
-        """登録済みの商品を削除する"""
+        """登録済みの商品を削除する
+
+        論理削除のみ行い、仕入・売上を含めた物理削除はジョブで行う。
+        """
         product = self.get_object(_id)
-        product.delete()
+        soft_delete_products([product.pk])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class ProductBulkDeleteView(views.APIView):
+    """商品の一括削除に関する関数"""
+
+    authentication_classes: ClassVar[type[JWTAuthentication]] = [JWTAuthentication]
+    permission_classes: ClassVar[type[IsAuthenticated]] = [IsAuthenticated]
+
+    def post(self, request: Request, format=None) -> Response:
+        """複数の商品をまとめて削除する
+
+        論理削除した件数と、物理削除のジョブの状態を確認するURLを返す。
+        """
+        serializer = ProductBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        deleted, job = soft_delete_products(serializer.validated_data["ids"])
+        if job is None:
+            return Response({"deleted": 0}, status=status.HTTP_200_OK)
+
+        url = _get_job_url(request, job)
+        return Response(
+            {"deleted": deleted, "job": {"id": job.pk, "url": url}},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": url},
+        )
+
+
 class ProductModelViewSet(viewsets.ModelViewSet):
     """商品操作に関する関数（ModelViewSet）"""
 
@@ -227,6 +322,7 @@ class PurchaseView(views.APIView):
         serializer = PurchaseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        bump_history_version(serializer.instance.product_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -239,22 +335,112 @@ class SalesView(views.APIView):
         serializer.is_valid(raise_exception=True)
         self._check_quantity_is_over(request)
         serializer.save()
+        bump_history_version(serializer.instance.product_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def _check_quantity_is_over(self, request: Request) -> None:
-        """売る分の数量が在庫を超えないかチェック"""
-        # 在庫テーブルのレコードを取得
-        purchase = Purchase.objects.filter(
-            product_id=request.data["product"]
-        ).aggregate(quantity_sum=Coalesce(Sum("quantity"), 0))
-
-        # 卸しテーブルのレコードを取得
-        sales = Sales.objects.filter(product_id=request.data["product"]).aggregate(
-            quantity_sum=Coalesce(Sum("quantity"), 0)
-        )
+        """売る分の数量が在庫を超えないかチェック
 
-        stock = purchase["quantity_sum"] - sales["quantity_sum"]
-        is_over = stock < int(request.data["quantity"])
+        アーカイブは仕入・売上を繰越在庫へ移しながら並行して動くので、
+        繰越在庫、仕入、売上の合計を別々のクエリで読むと、その間にコミットされた分を
+        二重に数えることがある。1つのSQLで同じ時点の3つの合計を読む。
+        """
+        product_id = request.data["product"]
+        stock = (
+            Product.objects.filter(pk=product_id)
+            .annotate(
+                # 繰越在庫と仕入の合計から売上の合計を引いたものが在庫数
+                stock=self._quantity_sum(OpeningBalance)
+                + self._quantity_sum(Purchase)
+                - self._quantity_sum(Sales)
+            )
+            .values_list("stock", flat=True)
+            .first()
+        )
+        is_over = (stock or 0) < int(request.data["quantity"])
         if is_over:
             errmsg = "在庫数量を超過することはできません"
             raise BusinessException(errmsg)
+
+    def _quantity_sum(self, model: type[Model]) -> Coalesce:
+        """商品毎の数量の合計を求めるサブクエリ"""
+        quantity_sum = (
+            model.objects.filter(product_id=OuterRef("pk"))
+            .order_by()
+            .values("product_id")
+            .annotate(quantity_sum=Sum("quantity"))
+            .values("quantity_sum")
+        )
+        return Coalesce(Subquery(quantity_sum), 0)
+
+
+class JobView(views.APIView):
+    """バックグラウンドジョブに関する関数
+
+    時間の掛かる処理はジョブとして登録し、`run_jobs` コマンドのワーカで実行する。
+    """
+
+    def get(self, request: Request, _id: int, format=None) -> Response:
+        """ジョブの状態を取得する"""
+        try:
+            job = Job.objects.get(pk=_id)
+        except Job.DoesNotExist as e:
+            raise NotFound from e
+        serializer = JobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def post(self, request: Request, format=None) -> Response:
+        """ジョブを登録する
+
+        処理の完了を待たずに202を返す。状態は返却したURLで確認する。
+        """
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(**serializer.validated_data)
+        url = _get_job_url(request, job)
+        return Response(
+            {"id": job.pk, "status": job.status, "url": url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": url},
+        )
+
+
+class BatchView(views.APIView):
+    """複数のAPI呼び出しを1回のリクエストでまとめて実行する"""
+
+    def post(self, request: Request, format=None) -> Response:
+        """まとめて受け取ったリクエストを実行し、結果をまとめて返す
+
+        parallel が真で、全てが読み取りのリクエストの場合は並列に実行する。
+        """
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = dispatch_batch(
+            request,
+            serializer.validated_data["requests"],
+            parallel=serializer.validated_data["parallel"],
+        )
+        return Response({"responses": responses}, status=status.HTTP_200_OK)
+
+
+class ReorderView(views.APIView):
+    """発注レポートに関する関数"""
+
+    def get(self, request: Request, format=None) -> Response:
+        """在庫切れが近く、発注が必要な商品の一覧を取得する
+
+        クエリパラメータ threshold で在庫切れまでの日数のしきい値を、
+        all=true で発注対象以外の商品も含めるかを指定する。
+        """
+        serializer = ReorderQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        report = get_reorder_report(
+            serializer.validated_data["threshold"],
+            include_all=serializer.validated_data["all"],
+        )
+        return Response(report, status=status.HTTP_200_OK)
+
+
+def _get_job_url(request: Request, job: Job) -> str:
+    """ジョブの状態を確認するURLを組み立てる"""
+    return request.build_absolute_uri(reverse("job_detail", args=[job.pk]))
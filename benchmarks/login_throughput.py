@@ -0,0 +1,90 @@
+"""ログインのスループットを計測する
+
+使い方:
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --logins 2000 --users 200
+
+一時ファイルのSQLiteに利用者を作成し、`/api/inventory/login/` を繰り返し呼び出す。
+最終ログイン日時をログインの度に書き込む場合（LAST_LOGIN_FLUSH_INTERVAL=0）と、
+書き込みバッファでまとめる場合を比較する。
+パスワードハッシュの計算時間が支配的になると書き込みの差が見えないため、
+既定では高速なハッシュ関数を使う（`--hasher default` で本番と同じ設定になる）。
+"""  # noqa: INP001
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FAST_HASHER = "django.contrib.auth.hashers.MD5PasswordHasher"
+
+
+def main() -> None:
+    """計測を実行する"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--hasher", choices=["fast", "default"], default="fast")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.api")
+
+    import django
+    from django.conf import settings
+
+    workdir = tempfile.TemporaryDirectory()
+    # プロファイルのDB設定に関わらず、一時ファイルのSQLiteで計測する
+    settings.DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": Path(workdir.name) / "bench.sqlite3",
+    }
+    settings.DEBUG = False
+    settings.LOGGING_CONFIG = None
+    if args.hasher == "fast":
+        settings.PASSWORD_HASHERS = [FAST_HASHER]
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from api.inventory.last_login import last_login_buffer
+
+    call_command("migrate", verbosity=0)
+    user_model = get_user_model()
+    for i in range(args.users):
+        user_model.objects.create_user(f"user{i}", password="password")  # noqa: S106
+
+    client = Client()
+
+    def run(interval: int) -> float:
+        with override_settings(LAST_LOGIN_FLUSH_INTERVAL=interval):
+            started = time.perf_counter()
+            for i in range(args.logins):
+                response = client.post(
+                    "/api/inventory/login/",
+                    {"username": f"user{i % args.users}", "password": "password"},
+                    content_type="application/json",
+                )
+                assert response.status_code == 200  # noqa: PLR2004, S101
+            last_login_buffer.flush()
+            return time.perf_counter() - started
+
+    print(f"{'mode':<14} {'logins/s':>10} {'ms/login':>10}")  # noqa: T201
+    for mode, interval in (("synchronous", 0), ("write-behind", 5)):
+        elapsed = run(interval)
+        print(  # noqa: T201
+            f"{mode:<14} {args.logins / elapsed:>10.1f} "
+            f"{elapsed * 1000 / args.logins:>10.3f}"
+        )
+
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
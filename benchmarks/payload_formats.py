@@ -0,0 +1,81 @@
+"""在庫履歴のJSONとMessagePackのサイズと変換時間を比較する
+
+使い方:
+    python benchmarks/payload_formats.py
+    python benchmarks/payload_formats.py --rows 100000 --repeat 5
+
+`InventoryView` が返す形式の履歴をrows件作り、DRFのJSONRenderer/JSONParserと
+MessagePackRenderer/MessagePackParserで変換する。
+"""  # noqa: INP001
+
+import argparse
+import datetime
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def main() -> None:
+    """計測を実行する"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.api")
+
+    import django
+
+    django.setup()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from api.inventory.parsers import MessagePackParser
+    from api.inventory.renderers import MessagePackRenderer
+
+    start = datetime.datetime(2020, 1, 1, tzinfo=datetime.UTC)
+    history = [
+        {
+            "id": i,
+            "unit": 1980,
+            "quantity": i % 50 + 1,
+            "type": i % 2 + 1,
+            "date": start + datetime.timedelta(minutes=i),
+        }
+        for i in range(args.rows)
+    ]
+
+    def best(func: callable) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    print(  # noqa: T201
+        f"{args.rows} rows\n"
+        f"{'format':<10} {'bytes':>12} {'encode (ms)':>12} {'decode (ms)':>12}"
+    )
+    for name, renderer, body_parser in (
+        ("json", JSONRenderer(), JSONParser()),
+        ("msgpack", MessagePackRenderer(), MessagePackParser()),
+    ):
+        body = renderer.render(history)
+        encode = best(lambda renderer=renderer: renderer.render(history))
+        decode = best(
+            lambda body_parser=body_parser, body=body: body_parser.parse(
+                io.BytesIO(body), parser_context={}
+            )
+        )
+        print(f"{name:<10} {len(body):>12} {encode:>12.1f} {decode:>12.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""プロファイル毎の起動時間とリクエスト毎のオーバーヘッドを計測する
+
+使い方:
+    python benchmarks/profile_overhead.py
+    python benchmarks/profile_overhead.py --profiles config.settings.base config.settings.api
+
+api プロファイルは development のDB設定を引き継ぐので、同じDBで比べられるよう
+既定では development と api を計測する。
+
+起動時間は新しいインタプリタで django.setup() からWSGIアプリ生成、
+URLConfの読み込みまでを計測する。
+リクエスト毎のオーバーヘッドはビューがDBを読み書きしない `/api/inventory/logout/` を
+WSGIハンドラへ直接流し、ミドルウェアとビュー呼び出しの時間を計測する。
+"""  # noqa: INP001
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PROFILES = ["config.settings.development", "config.settings.api"]
+PATH = "/api/inventory/logout/"
+
+
+def _measure(requests: int) -> dict[str, float]:
+    """子プロセス側で1プロファイル分を計測する"""
+    started = time.perf_counter()
+    import django
+
+    django.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.test import RequestFactory
+    from django.urls import get_resolver
+
+    handler = get_wsgi_application()
+    get_resolver().url_patterns  # noqa: B018
+    startup = time.perf_counter() - started
+
+    factory = RequestFactory()
+
+    def call() -> None:
+        environ = factory._base_environ(  # noqa: SLF001
+            PATH_INFO=PATH,
+            REQUEST_METHOD="POST",
+            CONTENT_LENGTH="0",
+        )
+        handler(environ, lambda *_: None)
+
+    # ウォームアップ
+    for _ in range(100):
+        call()
+    started = time.perf_counter()
+    for _ in range(requests):
+        call()
+    per_request = (time.perf_counter() - started) / requests
+    return {
+        "startup_ms": startup * 1000,
+        "per_request_us": per_request * 1_000_000,
+    }
+
+
+def _run_child(profile: str, requests: int) -> dict[str, float]:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": profile}
+    output = subprocess.check_output(  # noqa: S603
+        [sys.executable, __file__, "--child", "--requests", str(requests)],
+        cwd=BASE_DIR,
+        env=env,
+    )
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    """計測を実行し、プロファイル毎の中央値を表示する"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, str(BASE_DIR))
+        print(json.dumps(_measure(args.requests)))  # noqa: T201
+        return
+
+    print(f"{'profile':<24} {'startup (ms)':>14} {'per request (us)':>18}")  # noqa: T201
+    for profile in args.profiles:
+        results = [_run_child(profile, args.requests) for _ in range(args.runs)]
+        startup = statistics.median(r["startup_ms"] for r in results)
+        per_request = statistics.median(r["per_request_us"] for r in results)
+        print(f"{profile:<24} {startup:>14.1f} {per_request:>18.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
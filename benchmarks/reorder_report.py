@@ -0,0 +1,106 @@
+"""発注レポートの集計時間を計測する
+
+使い方:
+    python benchmarks/reorder_report.py
+    python benchmarks/reorder_report.py --products 100000 --sales 1000000
+
+一時ファイルのSQLiteに商品と仕入・売上を作成し、全件集計、差分更新、
+キャッシュ済みの状態からのレポート作成の時間を計測する。
+"""  # noqa: INP001
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def main() -> None:
+    """計測を実行する"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--sales", type=int, default=500_000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.api")
+
+    import django
+    from django.conf import settings
+
+    workdir = tempfile.TemporaryDirectory()
+    # プロファイルのDB設定に関わらず、一時ファイルのSQLiteで計測する
+    settings.DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": Path(workdir.name) / "bench.sqlite3",
+    }
+    settings.DEBUG = False
+    settings.LOGGING_CONFIG = None
+    django.setup()
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from api.inventory.models import Product
+    from api.inventory.models import Purchase
+    from api.inventory.models import Sales
+    from api.inventory.reorder import build_reorder_state
+    from api.inventory.reorder import get_reorder_report
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(0)  # noqa: S311
+    now = timezone.now()
+    Product.objects.bulk_create(
+        (Product(name=f"product{i}", price=100) for i in range(args.products)),
+        batch_size=5000,
+    )
+    Purchase.objects.bulk_create(
+        (
+            Purchase(
+                product_id=i + 1,
+                quantity=rng.randint(10, 500),
+                purchase_date=now - datetime.timedelta(days=90),
+            )
+            for i in range(args.products)
+        ),
+        batch_size=5000,
+    )
+
+    def sales(count: int) -> list[Sales]:
+        return [
+            Sales(
+                product_id=rng.randint(1, args.products),
+                quantity=rng.randint(1, 5),
+                sales_date=now
+                - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+            )
+            for _ in range(count)
+        ]
+
+    Sales.objects.bulk_create(sales(args.sales), batch_size=5000)
+
+    def timed(label: str, func: callable) -> object:
+        started = time.perf_counter()
+        result = func()
+        print(f"{label:<32} {(time.perf_counter() - started) * 1000:>10.1f} ms")  # noqa: T201
+        return result
+
+    print(f"{args.products} products, {args.sales} sales")  # noqa: T201
+    timed("full build", build_reorder_state)
+    report = timed("report (cold cache)", lambda: get_reorder_report(14))
+    timed("report (cached state)", lambda: get_reorder_report(14))
+    Sales.objects.bulk_create(sales(1000), batch_size=1000)
+    timed("report (+1000 new sales)", lambda: get_reorder_report(14))
+    timed("report (all products)", lambda: get_reorder_report(14, include_all=True))
+    print(f"flagged products: {len(report['items'])}")  # noqa: T201
+
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""API専用プロファイル
+
+`/api/inventory/` だけを配信するための設定。
+JWT認証のAPIでは使わないセッション、CSRF、メッセージ、テンプレートと
+admin、hello、hello_db アプリを読み込まず、起動時間とリクエスト毎の
+ミドルウェアのオーバーヘッドを削る。
+
+admin が必要な場合は従来どおり base / development プロファイルを使う。
+DB設定(ATOMIC_REQUESTS を含む)は development をそのまま使い、
+ここではアプリ、ミドルウェア、URLConf、テンプレート、レンダラだけを変える。
+"""  # noqa: INP001
+
+from .development import *  # noqa: F403
+from .development import INVENTORY_NAME
+from .development import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    # first party
+    INVENTORY_NAME,
+    # third party
+    "rest_framework",
+    "rest_framework_simplejwt",
+    # django
+    # JWT認証でユーザを引くために auth と contenttypes だけは必要
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+]
+
+# 認証はDRFの認証クラスで行い、CSRFはAPIViewが免除しているため、
+# セッション、CSRF、認証、メッセージ、クリックジャッキングのミドルウェアは外す
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+ROOT_URLCONF = "config.urls_api"
+
+# HTMLを返さないのでテンプレートエンジンは使わない
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    # ブラウザブルAPIはテンプレートとセッションに依存するので外す。
+    # パーサはリクエストの Content-Type に一致した時しか使われないので、base のまま残す
+    "DEFAULT_RENDERER_CLASSES": tuple(
+        renderer
+        for renderer in REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]
+        if renderer != "rest_framework.renderers.BrowsableAPIRenderer"
+    ),
+}
@@ -154,6 +154,20 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # Acceptヘッダで application/msgpack が指定された場合はMessagePackで返す
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "api.inventory.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "api.inventory.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # 日時は文字列にせずレンダラに渡す。JSONではISO 8601、MessagePackではTimestamp型になる
+    "DATETIME_FORMAT": None,
 }
 
 # クッキーの有効期限: 12時間
@@ -164,5 +178,32 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": datetime.timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": datetime.timedelta(days=30),
     "ROTATE_REFRESH_TOKENS": True,
-    "UPDATE_LAST_LOGIN": True,
+    # 最終ログイン日時はLoginSerializerでまとめて書き込むため、ここでは更新しない
+    "UPDATE_LAST_LOGIN": False,
+    "TOKEN_OBTAIN_SERIALIZER": "api.inventory.serializers.LoginSerializer",
 }
+
+# 最終ログイン日時をまとめて書き込む間隔(秒)。0の場合はログインの度に書き込む
+LAST_LOGIN_FLUSH_INTERVAL = 5
+
+# 在庫履歴のキャッシュ保持期間(秒)。キーに履歴バージョンを含むため、更新時の削除は不要
+INVENTORY_HISTORY_CACHE_TIMEOUT = 60 * 10
+
+# ジョブ失敗時の再実行までの基準間隔(秒)。試行回数毎に2倍にする
+JOB_RETRY_BACKOFF = 10
+# 実行中のジョブの生存確認を更新する間隔(秒)
+JOB_HEARTBEAT_INTERVAL = 60
+# 生存確認がこの秒数途絶えたジョブはワーカが停止したとみなして再実行する
+JOB_RUNNING_TIMEOUT = 60 * 5
+
+# バッチAPIで1回に受け付けるリクエスト数と、並列実行時のスレッド数
+BATCH_MAX_REQUESTS = 50
+BATCH_MAX_WORKERS = 4
+
+# 発注レポート: 販売数を求める期間(日)、発注対象とする在庫切れまでの日数、全件集計し直す間隔(秒)
+REORDER_WINDOW_DAYS = 28
+REORDER_THRESHOLD_DAYS = 14
+REORDER_REBUILD_INTERVAL = 60 * 60
+
+# 商品の一括削除で1回に受け付ける件数
+PRODUCT_BULK_DELETE_MAX = 1000
@@ -0,0 +1,12 @@
+"""URL configuration for the API-only profile.
+
+`config.settings.api` から使われる。admin と hello 系のアプリを読み込まず、
+在庫APIのみを公開する。
+"""
+
+from django.urls import include
+from django.urls import path
+
+urlpatterns = [
+    path("api/inventory/", include("api.inventory.urls")),
+]